@@ -2,8 +2,9 @@ import argparse
 import json
 import sys
 
-from PIL import Image
-import piexif
+import cv2 as cv
+import numpy as np
+from PIL import Image, ImageOps
 
 from .library import SmartCrop
 
@@ -26,26 +27,7 @@ def main() -> None:
     image = Image.open(options.inputfile)
 
     # Apply orientation from EXIF metadata
-    if "exif" in image.info:
-        exif_dict = piexif.load(image.info["exif"])
-
-        if piexif.ImageIFD.Orientation in exif_dict["0th"]:
-            orientation = exif_dict["0th"].pop(piexif.ImageIFD.Orientation)
-            exif_bytes = piexif.dump(exif_dict)
-            if orientation == 2:
-                image = image.transpose(Image.FLIP_LEFT_RIGHT)
-            elif orientation == 3:
-                image = image.rotate(180)
-            elif orientation == 4:
-                image = image.rotate(180).transpose(Image.FLIP_LEFT_RIGHT)
-            elif orientation == 5:
-                image = image.rotate(-90, expand=True).transpose(Image.FLIP_LEFT_RIGHT)
-            elif orientation == 6:
-                image = image.rotate(-90, expand=True)
-            elif orientation == 7:
-                image = image.rotate(90, expand=True).transpose(Image.FLIP_LEFT_RIGHT)
-            elif orientation == 8:
-                image = image.rotate(90, expand=True)
+    image = ImageOps.exif_transpose(image)
 
     # Ensure image is in RGB (convert it otherwise)
     if image.mode not in ('RGB', 'RGBA'):
@@ -75,4 +57,11 @@ def main() -> None:
 
     cropped_image = image.crop(box)
     cropped_image.thumbnail((options.width, options.height), Image.Resampling.LANCZOS)
-    cropped_image.save(options.outputfile, 'JPEG', quality=90)
+    # Encode with OpenCV (libjpeg-turbo); imencode keeps the output JPEG
+    # regardless of the output file's extension, as the PIL save did
+    _, encoded = cv.imencode(
+        '.jpg',
+        cv.cvtColor(np.asarray(cropped_image.convert('RGB')), cv.COLOR_RGB2BGR),
+        [cv.IMWRITE_JPEG_QUALITY, 90])
+    with open(options.outputfile, 'wb') as output_file:
+        output_file.write(encoded)
@@ -1,3 +1,4 @@
+import functools
 import os
 import numpy as np
 import cv2 as cv
@@ -54,11 +55,19 @@ class YuNet:
         return np.array([]) if faces[1] is None else faces[1]
 
 
+def cudaAvailable():
+    try:
+        return hasattr(cv.dnn, 'DNN_BACKEND_CUDA') and cv.cuda.getCudaEnabledDeviceCount() > 0
+    except cv.error:
+        return False
+
+
 class FaceDetector:
-    def __init__(self, backend_target=0,
+    def __init__(self, backend_target=None,
                  conf_threshold=0.8,
                  nms_threshold=0.3,
-                 top_k=5000) -> None:
+                 top_k=5000,
+                 input_size=640) -> None:
         # Valid combinations of backends and targets
         backend_target_pairs = [
             [cv.dnn.DNN_BACKEND_OPENCV, cv.dnn.DNN_TARGET_CPU],
@@ -68,19 +77,28 @@ class FaceDetector:
             [cv.dnn.DNN_BACKEND_CANN, cv.dnn.DNN_TARGET_NPU]
         ]
 
+        if backend_target is None:
+            # Prefer CUDA + FP16 when a CUDA device is present, CPU otherwise
+            backend_target = 2 if cudaAvailable() else 0
+
         backend_id = backend_target_pairs[backend_target][0]
         target_id = backend_target_pairs[backend_target][1]
 
         # Instantiate YuNet
         here = os.path.abspath(os.path.dirname(__file__))
+        self.inputSize = input_size
         self.model = YuNet(modelPath=os.path.join(here, 'face_detection_yunet_2023mar.onnx'),
-                           inputSize=[320, 320],
+                           inputSize=[input_size, input_size],
                            confThreshold=conf_threshold,
                            nmsThreshold=nms_threshold,
                            topK=top_k,
                            backendId=backend_id,
                            targetId=target_id)
 
+        # One-shot warmup so lazy backend initialization (cuDNN algorithm
+        # search on CUDA) is not paid by the first real detect() call
+        self.model.infer(np.zeros((input_size, input_size, 3), np.uint8))
+
     def visualize(self, image, results, box_color=(0, 255, 0), text_color=(0, 0, 255), fps=None):
         output = image.copy()
         landmark_color = [
@@ -115,9 +133,22 @@ class FaceDetector:
         image = cv.cvtColor(np.array(img), cv.COLOR_RGB2BGR)
         h, w, _ = image.shape
 
-        # Inference
-        self.model.setInputSize([w, h])
-        results = self.model.infer(image)
+        # Letterbox to the model's fixed square input instead of calling
+        # setInputSize per image, which reallocates DNN buffers (and reruns
+        # cuDNN algorithm selection on CUDA backends) on every call
+        scale = self.inputSize / max(h, w)
+        resized = cv.resize(image, (int(w * scale), int(h * scale)))
+        padded = cv.copyMakeBorder(
+            resized,
+            0, self.inputSize - resized.shape[0],
+            0, self.inputSize - resized.shape[1],
+            cv.BORDER_CONSTANT, value=(0, 0, 0))
+
+        # Inference, mapping detections back to the original resolution
+        results = self.model.infer(padded)
+        if results.size:
+            results = results.copy()
+            results[:, 0:14] /= scale
 
         # Print results
         print('{} faces detected.'.format(results.shape[0]))
@@ -135,6 +166,18 @@ class FaceDetector:
         return results
 
 
+@functools.lru_cache(maxsize=4)
+def getFaceDetector(backend_target=None,
+                    conf_threshold=0.8,
+                    nms_threshold=0.3,
+                    top_k=5000,
+                    input_size=640):
+    """Shared FaceDetector per configuration: reloading the ONNX model and
+    warming the backend up costs hundreds of ms, so reuse one instance across
+    repeated SmartCropWithFace constructions."""
+    return FaceDetector(backend_target, conf_threshold, nms_threshold, top_k, input_size)
+
+
 if __name__ == '__main__':
     dtr = FaceDetector()
     dtr.detect('/home/songfuqiang/smartcrop.py/tests/images/65309527.jpg')
@@ -4,31 +4,86 @@ import os
 import math
 import sys
 
+import cv2 as cv
 import numpy as np
 from PIL import Image, ImageDraw
-from PIL.ImageFilter import Kernel
-
-
-def saturation(image) -> np.ndarray:
-    r, g, b = image.split()
-    r, g, b = np.array(r), np.array(g), np.array(b)
-    r, g, b = r.astype(float), g.astype(float), b.astype(float)
-    maximum = np.maximum(np.maximum(r, g), b)  # [0; 255]
-    minimum = np.minimum(np.minimum(r, g), b)  # [0; 255]
-    s = (maximum + minimum) / 255  # [0.0; 1.0] pylint:disable=invalid-name
-    d = (maximum - minimum) / 255  # [0.0; 1.0] pylint:disable=invalid-name
-    d[maximum == minimum] = 0  # if maximum == minimum:
-    s[maximum == minimum] = 1  # -> saturation = 0 / 1 = 0
-    mask = s > 1
-    s[mask] = 2 - d[mask]
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:  # numba is optional, the NumPy path is used without it
+    HAS_NUMBA = False
+
+
+def saturation(rgb: np.ndarray) -> np.ndarray:
+    """Saturation of an (H, W, 3) float32 RGB array with values in [0; 255]."""
+    maximum = rgb.max(axis=2)  # [0; 255]
+    minimum = rgb.min(axis=2)  # [0; 255]
+    gray = maximum == minimum
+    s = (maximum + minimum) * np.float32(1 / 255)  # [0.0; 2.0] pylint:disable=invalid-name
+    d = (maximum - minimum) * np.float32(1 / 255)  # [0.0; 1.0] pylint:disable=invalid-name
+    s = np.where(s > 1, 2 - d, s)  # pylint:disable=invalid-name
+    d = np.where(gray, 0, d)  # if maximum == minimum: pylint:disable=invalid-name
+    s = np.where(gray, 1, s)  # -> saturation = 0 / 1 = 0 pylint:disable=invalid-name
     return d / s  # [0.0; 1.0]
 
 
 def thirds(x):
     """gets value in the range of [0, 1] where 0 is the center of the pictures
-    returns weight of rule of thirds [0, 1]"""
+    returns weight of rule of thirds [0, 1]
+
+    Branchless, works on scalars and coordinate arrays alike."""
     x = ((x + 2 / 3) % 2 * 0.5 - 0.5) * 16
-    return max(1 - x * x, 0)
+    return np.maximum(1 - x * x, 0)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _score_all_crops(  # pylint:disable=too-many-arguments,too-many-locals
+        target_array, crops_xywh, down_sample, outside_importance,
+        edge_radius, edge_weight, rule_of_thirds, skin_bias, saturation_bias
+    ):
+        """Fused importance + reduction kernel over all crops at once.
+
+        `target_array` is the (H, W, 4) float32 score array, `crops_xywh` an
+        (N, 4) float32 array of [x, y, width, height]; returns an (N, 4) array
+        of raw [detail, skin, saturation, boost] sums, one row per crop."""
+        height, width = target_array.shape[:2]
+        scores = np.zeros((crops_xywh.shape[0], 4), dtype=np.float32)
+        for i in prange(crops_xywh.shape[0]):  # pylint:disable=not-an-iterable
+            crop_x, crop_y = crops_xywh[i, 0], crops_xywh[i, 1]
+            crop_w, crop_h = crops_xywh[i, 2], crops_xywh[i, 3]
+            detail_sum = skin_sum = saturation_sum = boost_sum = 0.0
+            for row in range(height):
+                y = row * down_sample
+                for col in range(width):
+                    x = col * down_sample
+                    if crop_x <= x < crop_x + crop_w and crop_y <= y < crop_y + crop_h:
+                        px = abs(0.5 - (x - crop_x) / crop_w) * 2  # pylint:disable=invalid-name
+                        py = abs(0.5 - (y - crop_y) / crop_h) * 2  # pylint:disable=invalid-name
+                        dx = max(px - 1 + edge_radius, 0.0)        # pylint:disable=invalid-name
+                        dy = max(py - 1 + edge_radius, 0.0)        # pylint:disable=invalid-name
+                        d = (dx * dx + dy * dy) * edge_weight      # pylint:disable=invalid-name
+                        s = 1.41 - math.sqrt(px * px + py * py)    # pylint:disable=invalid-name
+                        if rule_of_thirds:
+                            tx = ((px + 2 / 3) % 2 * 0.5 - 0.5) * 16  # pylint:disable=invalid-name
+                            ty = ((py + 2 / 3) % 2 * 0.5 - 0.5) * 16  # pylint:disable=invalid-name
+                            s += (max(s + d + 0.5, 0.0) * 1.2) * (
+                                max(1 - tx * tx, 0.0) + max(1 - ty * ty, 0.0))
+                        importance = s + d
+                    else:
+                        importance = outside_importance
+                    detail = target_array[row, col, 1]
+                    detail_sum += detail * importance
+                    skin_sum += target_array[row, col, 0] * (detail + skin_bias) * importance
+                    saturation_sum += (
+                        target_array[row, col, 2] * (detail + saturation_bias) * importance)
+                    boost_sum += target_array[row, col, 3] * importance
+            scores[i, 0] = detail_sum
+            scores[i, 1] = skin_sum
+            scores[i, 2] = saturation_sum
+            scores[i, 3] = boost_sum
+        return scores
 
 
 class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
@@ -77,6 +132,9 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
         self.skin_weight = skin_weight
         self.boosts = None
         self.debug = debug
+        # Specialize the importance kernel once instead of branching per map
+        self._importance_map = (
+            self._importance_map_thirds if rule_of_thirds else self._importance_map_plain)
 
     def analyse(  # pylint:disable=too-many-arguments,too-many-locals
         self,
@@ -93,33 +151,35 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
         This implementation / algorithm is really slow for large images.
         Use `crop()` which is pre-scaling the image before analyzing it.
         """
-        cie_image = image.convert('L', (0.2126, 0.7152, 0.0722, 0))
-        cie_array = np.array(cie_image)  # [0; 255]
+        # Single shared RGB buffer for the skin, saturation and luma passes
+        rgb_image = image if image.mode == 'RGB' else image.convert('RGB')
+        rgb_array = np.asarray(rgb_image, dtype=np.float32)  # [0; 255]
+        # BLAS-dispatched luma, rounding like PIL's convert('L', matrix) did
+        cie_array = (rgb_array @ np.array(
+            (0.2126, 0.7152, 0.0722), dtype=np.float32)).round().astype(np.uint8)  # [0; 255]
 
         # R=skin G=edge B=saturation A=boost
-        edge_image = self.detect_edge(cie_image)
-        skin_image = self.detect_skin(cie_array, image)
-        saturation_image = self.detect_saturation(cie_array, image)
-        boost_image = self.applyBoosts(image)
-        analyse_image = Image.merge('RGBA', [skin_image, edge_image, saturation_image, boost_image])
-
-        del edge_image
-        del skin_image
-        del saturation_image
-        del boost_image
-
-        score_image = analyse_image.copy()
-        score_image.thumbnail(
+        analyse_array = np.dstack([
+            self.detect_skin(cie_array, rgb_array),
+            self.detect_edge(cie_array),
+            self.detect_saturation(cie_array, rgb_array),
+            self.applyBoosts(image)])
+        analyse_image = Image.fromarray(analyse_array, 'RGBA')
+
+        # INTER_AREA is a plain box filter for integer factors (what
+        # PIL.Image.reduce would do), without leaving the ndarray pipeline
+        score_array = cv.resize(
+            analyse_array,
             (
                 int(math.ceil(image.size[0] / self.score_down_sample)),
                 int(math.ceil(image.size[1] / self.score_down_sample))
             ),
-            Image.Resampling.LANCZOS)
+            interpolation=cv.INTER_AREA).astype(np.float32) / 255
 
         top_crop = None
         top_score = -sys.maxsize
 
-        crops = self.crops(
+        crops_xywh = self.crops(
             image,
             crop_width,
             crop_height,
@@ -127,10 +187,23 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
             min_scale=min_scale,
             scale_step=scale_step,
             step=step)
+        crops = [
+            {'x': int(x), 'y': int(y), 'width': width, 'height': height}
+            for x, y, width, height in crops_xywh.tolist()]
+
+        if HAS_NUMBA:
+            raw_scores = _score_all_crops(
+                score_array, crops_xywh, self.score_down_sample, self.outside_importance,
+                self.edge_radius, self.edge_weight, self.rule_of_thirds,
+                self.skin_bias, self.saturation_bias)
+            for crop, raw in zip(crops, raw_scores):
+                crop['score'] = self._score_dict(
+                    float(raw[0]), float(raw[1]), float(raw[2]), float(raw[3]), crop)
+        else:
+            self._score_crops_pruned(score_array, crops)
 
         for i, crop in enumerate(crops):
-            crop['score'] = self.score(score_image, crop)
-            if crop['score']['total'] > top_score:
+            if crop['score'] is not None and crop['score']['total'] > top_score:
                 top_crop = crop
                 top_score = crop['score']['total']
                 if self.debug:
@@ -163,8 +236,7 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
         if prescale:
             prescale_size = 1 / scale / min_scale
             if prescale_size < 1:
-                image = image.copy()
-                image.thumbnail(
+                image = image.resize(
                     (int(image.size[0] * prescale_size), int(image.size[1] * prescale_size)),
                     Image.Resampling.LANCZOS)
                 crop_width = int(math.floor(crop_width * prescale_size))
@@ -208,7 +280,9 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
         min_scale: float = 0.9,
         scale_step: float = 0.1,
         step: int = 8
-    ) -> list[dict]:
+    ) -> np.ndarray:
+        """Candidate crops as an (N, 4) float32 array of [x, y, width, height]
+        rows, ready for batched scoring."""
         image_width, image_height = image.size
         crops = []
         for scale in (
@@ -217,35 +291,39 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
                 int((min_scale - scale_step) * 100),
                 -int(scale_step * 100))
         ):
-            for y in range(0, image_height, step):
-                if y + crop_height * scale > image_height:
-                    break
-                for x in range(0, image_width, step):
-                    if x + crop_width * scale > image_width:
-                        break
-                    crops.append({
-                        'x': x,
-                        'y': y,
-                        'width': crop_width * scale,
-                        'height': crop_height * scale,
-                    })
+            width = crop_width * scale
+            height = crop_height * scale
+            if width > image_width or height > image_height:
+                continue
+            xs = np.arange(0, int(image_width - width) + 1, step)  # pylint:disable=invalid-name
+            ys = np.arange(0, int(image_height - height) + 1, step)  # pylint:disable=invalid-name
+            grid_x, grid_y = np.meshgrid(xs, ys)
+            crops.append(np.column_stack((
+                grid_x.ravel(),
+                grid_y.ravel(),
+                np.full(grid_x.size, width),
+                np.full(grid_x.size, height))))
         if not crops:
             raise ValueError(locals())
-        return crops
+        return np.vstack(crops).astype(np.float32)
 
     def debug_crop(self, analyse_image, crop: dict):
-        debug_image = analyse_image.copy()
-        debug_pixels = debug_image.getdata()
-        boost_pixels = debug_pixels.copy()
-        debug_boost_image = Image.new(
-            'RGBA',
-            (
-                debug_image.size[0],
-                debug_image.size[1]
-            ),
-            (0, 0, 0, 0)
-        )
-        debug_boost_pixels = debug_boost_image.getdata()
+        pixels = np.array(analyse_image)  # (H, W, 4) uint8
+        height, width = pixels.shape[:2]
+        yy, xx = np.mgrid[0:height, 0:width]  # pylint:disable=invalid-name
+        importance = self._importance_map(crop, xx, yy)
+
+        # importance > 0 tints green, importance < 0 tints red
+        pixels[..., 1] = np.clip(
+            pixels[..., 1] + np.where(importance > 0, importance * 32, 0), 0, 255)
+        pixels[..., 0] = np.clip(
+            pixels[..., 0] + np.where(importance < 0, importance * -64, 0), 0, 255)
+
+        boost_gray = pixels[..., 3] // 2
+        debug_boost_image = Image.fromarray(
+            np.dstack([boost_gray, boost_gray, boost_gray, boost_gray]), 'RGBA')
+
+        debug_image = Image.fromarray(pixels, 'RGBA')
         debug_crop_image = Image.new(
             'RGBA',
             (
@@ -261,46 +339,23 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
             ),
             outline=(255, 0, 0))
 
-        for y in range(analyse_image.size[1]):        # height
-            for x in range(analyse_image.size[0]):    # width
-                index = y * analyse_image.size[0] + x
-                importance = self.importance(crop, x, y)
-                if importance > 0:
-                    debug_pixels.putpixel(
-                        (x, y),
-                        (
-                            debug_pixels[index][0],
-                            int(debug_pixels[index][1] + importance * 32),
-                            debug_pixels[index][2],
-                        ))
-                elif importance < 0:
-                    debug_pixels.putpixel(
-                        (x, y),
-                        (
-                            int(debug_pixels[index][0] + importance * -64),
-                            debug_pixels[index][1],
-                            debug_pixels[index][2],
-                        ))
-                boost_value = boost_pixels[index][3]//2
-                debug_boost_pixels.putpixel(
-                    (x, y),
-                    (
-                        boost_value,
-                        boost_value,
-                        boost_value,
-                        boost_value,
-                    ))
-
         debug_image.paste(debug_crop_image, (crop['x'], crop['y']), debug_crop_image.split()[3])
         debug_image.alpha_composite(debug_boost_image)
         return debug_image.convert('RGB')
 
-    def detect_edge(self, cie_image):
-        return cie_image.filter(Kernel((3, 3), (0, -1, 0, -1, 4, -1, 0, -1, 0), 1, 1))
-
-    def detect_saturation(self, cie_array: np.ndarray, source_image):
+    def detect_edge(self, cie_array: np.ndarray):
+        # The former PIL Kernel((3, 3), (0, -1, 0, -1, 4, -1, 0, -1, 0), 1, 1)
+        # is the negative Laplacian with offset 1, so invert and clip to uint8
+        laplacian = cv.Laplacian(cie_array, cv.CV_16S, ksize=1)
+        edge = np.clip(1 - laplacian, 0, 255).astype('uint8')
+        # PIL kernels leave the outermost pixels unfiltered; keep that behaviour
+        edge[0, :], edge[-1, :] = cie_array[0, :], cie_array[-1, :]
+        edge[:, 0], edge[:, -1] = cie_array[:, 0], cie_array[:, -1]
+        return edge
+
+    def detect_saturation(self, cie_array: np.ndarray, source_rgb: np.ndarray):
         threshold = self.saturation_threshold
-        saturation_data = saturation(source_image)
+        saturation_data = saturation(source_rgb)
         mask = (
             (saturation_data > threshold) &
             (cie_array >= self.saturation_brightness_min * 255) &
@@ -309,21 +364,16 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
         saturation_data[~mask] = 0
         saturation_data[mask] = (saturation_data[mask] - threshold) * (255 / (1 - threshold))
 
-        return Image.fromarray(saturation_data.astype('uint8'))
-
-    def detect_skin(self, cie_array: np.ndarray, source_image):
-        r, g, b = source_image.split()
-        r, g, b = np.array(r), np.array(g), np.array(b)
-        r, g, b = r.astype(float), g.astype(float), b.astype(float)
-        rd = np.ones_like(r) * -self.skin_color[0]  # pylint:disable=invalid-name
-        gd = np.ones_like(g) * -self.skin_color[1]  # pylint:disable=invalid-name
-        bd = np.ones_like(b) * -self.skin_color[2]  # pylint:disable=invalid-name
+        return saturation_data.astype('uint8')
 
-        mag = np.sqrt(r * r + g * g + b * b)
-        mask = ~(abs(mag) < 1e-6)
-        rd[mask] = r[mask] / mag[mask] - self.skin_color[0]
-        gd[mask] = g[mask] / mag[mask] - self.skin_color[1]
-        bd[mask] = b[mask] / mag[mask] - self.skin_color[2]
+    def detect_skin(self, cie_array: np.ndarray, source_rgb: np.ndarray):
+        r, g, b = source_rgb[..., 0], source_rgb[..., 1], source_rgb[..., 2]
+        mag2 = r * r + g * g + b * b
+        # black pixels keep the full -skin_color offset (inv_mag = 0)
+        inv_mag = np.where(mag2 < 1e-12, 0, 1 / np.sqrt(np.maximum(mag2, 1e-12)))
+        rd = r * inv_mag - self.skin_color[0]  # pylint:disable=invalid-name
+        gd = g * inv_mag - self.skin_color[1]  # pylint:disable=invalid-name
+        bd = b * inv_mag - self.skin_color[2]  # pylint:disable=invalid-name
 
         skin = 1 - np.sqrt(rd * rd + gd * gd + bd * bd)
         mask = (
@@ -331,26 +381,26 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
             (cie_array >= self.skin_brightness_min * 255) &
             (cie_array <= self.skin_brightness_max * 255))
 
-        skin_data = (skin - self.skin_threshold) * (255 / (1 - self.skin_threshold))
-        skin_data[~mask] = 0
+        skin_data = np.where(
+            mask, (skin - self.skin_threshold) * (255 / (1 - self.skin_threshold)), 0)
 
-        return Image.fromarray(skin_data.astype('uint8'))
+        return skin_data.astype('uint8')
 
     def applyBoosts(self, image):
         w, h = image.size
-        od = np.zeros((h, w))
+        od = np.zeros((h, w), dtype=np.int16)
         if self.boosts is not None:
             for boost in self.boosts:
                 self.applyBoost(boost, od)
-        return Image.fromarray(od.astype('uint8'))
+        return np.clip(od, 0, 255).astype('uint8')
 
     def applyBoost(self, boost, image):
         x0 = int(boost['x'])
         x1 = int(boost['x'] + boost['width'])
         y0 = int(boost['y'])
         y1 = int(boost['y'] + boost['height'])
-        weight = boost['weight'] * 255
-        image[y0:y1, x0:x1] += weight
+        weight = int(round(boost['weight'] * 255))
+        np.add(image[y0:y1, x0:x1], weight, out=image[y0:y1, x0:x1])
 
     def importance(self, crop: dict, x: int, y: int) -> float:
         if (
@@ -375,48 +425,159 @@ class SmartCrop(object):  # pylint:disable=too-many-instance-attributes
 
         return s + d
 
-    def score(self, target_image, crop: dict) -> dict:  # pylint:disable=too-many-locals
-        score = {
-            'detail': 0,
-            'saturation': 0,
-            'skin': 0,
-            'boost': 0,
-            'total': 0,
-        }
-        target_data = target_image.getdata()
-        target_width, target_height = target_image.size
+    def _importance_map_plain(self, crop: dict, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Vectorized `importance` without the rule-of-thirds term: x and y are
+        coordinate arrays (in original image coordinates), the result is a
+        float array of the same shape."""
+        inside = (
+            (crop['x'] <= x) & (x < crop['x'] + crop['width']) &
+            (crop['y'] <= y) & (y < crop['y'] + crop['height']))
+
+        x = (x - crop['x']) / crop['width']
+        y = (y - crop['y']) / crop['height']
+        px, py = np.abs(0.5 - x) * 2, np.abs(0.5 - y) * 2  # pylint:disable=invalid-name
 
+        # distance from edge
+        dx = np.maximum(px - 1 + self.edge_radius, 0)  # pylint:disable=invalid-name
+        dy = np.maximum(py - 1 + self.edge_radius, 0)  # pylint:disable=invalid-name
+        d = (dx * dx + dy * dy) * self.edge_weight     # pylint:disable=invalid-name
+        s = 1.41 - np.sqrt(px * px + py * py)          # pylint:disable=invalid-name
+
+        return np.where(inside, s + d, self.outside_importance).astype(np.float32)
+
+    def _importance_map_thirds(self, crop: dict, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """`_importance_map_plain` plus the rule-of-thirds term."""
+        inside = (
+            (crop['x'] <= x) & (x < crop['x'] + crop['width']) &
+            (crop['y'] <= y) & (y < crop['y'] + crop['height']))
+
+        x = (x - crop['x']) / crop['width']
+        y = (y - crop['y']) / crop['height']
+        px, py = np.abs(0.5 - x) * 2, np.abs(0.5 - y) * 2  # pylint:disable=invalid-name
+
+        # distance from edge
+        dx = np.maximum(px - 1 + self.edge_radius, 0)  # pylint:disable=invalid-name
+        dy = np.maximum(py - 1 + self.edge_radius, 0)  # pylint:disable=invalid-name
+        d = (dx * dx + dy * dy) * self.edge_weight     # pylint:disable=invalid-name
+        s = 1.41 - np.sqrt(px * px + py * py)          # pylint:disable=invalid-name
+
+        # pylint:disable=invalid-name
+        s = s + (np.maximum(s + d + 0.5, 0) * 1.2) * (thirds(px) + thirds(py))
+
+        return np.where(inside, s + d, self.outside_importance).astype(np.float32)
+
+    def _crop_rect(self, crop: dict) -> tuple[int, int, int, int]:
+        """(row, col, rows, cols) of a crop on the downsampled score grid."""
+        down_sample = self.score_down_sample
+        col = int(math.ceil(crop['x'] / down_sample))
+        row = int(math.ceil(crop['y'] / down_sample))
+        cols = int(math.ceil((crop['x'] + crop['width']) / down_sample)) - col
+        rows = int(math.ceil((crop['y'] + crop['height']) / down_sample)) - row
+        return row, col, rows, cols
+
+    def _importance_template(self, crop: dict, cache: dict) -> np.ndarray:
+        """Importance kernel of a crop over its own grid cells.
+
+        Crops at the same scale only differ by their (x, y) offset while the
+        kernel depends on relative coordinates only, so one template per
+        (size, grid phase) is computed and shared."""
         down_sample = self.score_down_sample
-        inv_down_sample = 1 / down_sample
-        target_width_down_sample = target_width * down_sample
-        target_height_down_sample = target_height * down_sample
-
-        for y in range(0, target_height_down_sample, down_sample):
-            for x in range(0, target_width_down_sample, down_sample):
-                index = int(
-                    math.floor(y * inv_down_sample) * target_width +
-                    math.floor(x * inv_down_sample)
-                )
-                importance = self.importance(crop, x, y)
-                detail = target_data[index][1] / 255
-                score['skin'] += (
-                    target_data[index][0] / 255 * (detail + self.skin_bias) * importance
-                )
-                score['detail'] += detail * importance
-                score['saturation'] += (
-                    target_data[index][2] / 255 * (detail + self.saturation_bias) * importance
-                )
-                score['boost'] += (
-                    target_data[index][3] / 255 * importance
-                )
-        score['total'] = (
-            score['detail'] * self.detail_weight +
-            score['skin'] * self.skin_weight +
-            score['saturation'] * self.saturation_weight +
-            score['boost'] * self.boost_weight
-        ) / (crop['width'] * crop['height'])
-
-        return score
+        key = (
+            crop['width'], crop['height'],
+            crop['x'] % down_sample, crop['y'] % down_sample)
+        template = cache.get(key)
+        if template is None:
+            row, col, rows, cols = self._crop_rect(crop)
+            xs = (np.arange(col, col + cols) * down_sample)[None, :]  # pylint:disable=invalid-name
+            ys = (np.arange(row, row + rows) * down_sample)[:, None]  # pylint:disable=invalid-name
+            template = cache[key] = self._importance_map(crop, xs, ys)
+        return template
+
+    def _crop_importance(self, crop: dict, shape: tuple[int, int], cache: dict) -> np.ndarray:
+        """Importance map of a crop over the full downsampled score grid:
+        the shared template blitted into the `outside_importance` background."""
+        height, width = shape
+        template = self._importance_template(crop, cache)
+        row, col = self._crop_rect(crop)[:2]
+        rows = min(template.shape[0], height - row)
+        cols = min(template.shape[1], width - col)
+        importance = np.full((height, width), self.outside_importance, dtype=np.float32)
+        importance[row:row + rows, col:col + cols] = template[:rows, :cols]
+        return importance
+
+    def _score_crops_pruned(self, score_array: np.ndarray, crops: list[dict]) -> None:
+        """Score crops best-first, skipping candidates whose upper bound
+        cannot beat the best total seen so far (branch and bound).
+
+        Every per-pixel score term is non-negative and only weighted by the
+        importance kernel, so `max(kernel) * sum(terms over the crop)` bounds
+        a crop's total from above; the rectangle sums come from one integral
+        image. Pruned crops get a score of None."""
+        detail = score_array[..., 1]
+        potential = (
+            detail * self.detail_weight +
+            score_array[..., 0] * (detail + self.skin_bias) * self.skin_weight +
+            score_array[..., 2] * (detail + self.saturation_bias) * self.saturation_weight +
+            score_array[..., 3] * self.boost_weight)
+        integral = cv.integral(potential)
+
+        shape = score_array.shape[:2]
+        importance_cache: dict = {}
+        bounds = np.empty(len(crops))
+        for i, crop in enumerate(crops):
+            template = self._importance_template(crop, importance_cache)
+            row, col, rows, cols = self._crop_rect(crop)
+            rows = min(rows, shape[0] - row)
+            cols = min(cols, shape[1] - col)
+            rect_sum = (
+                integral[row + rows, col + cols] - integral[row, col + cols] -
+                integral[row + rows, col] + integral[row, col])
+            bounds[i] = (
+                max(float(template.max()), 0) * rect_sum /
+                (crop['width'] * crop['height']) + 1e-6)
+
+        best = -sys.maxsize
+        for i in np.argsort(bounds)[::-1]:
+            crop = crops[i]
+            if bounds[i] <= best:
+                crop['score'] = None
+                continue
+            importance = self._crop_importance(crop, shape, importance_cache)
+            crop['score'] = self.score(score_array, crop, importance)
+            best = max(best, crop['score']['total'])
+
+    def score(self, target_array: np.ndarray, crop: dict, importance: np.ndarray | None = None) -> dict:
+        """Score a single crop against the downsampled analyse array
+        (H x W x 4 float32, channels scaled to [0.0; 1.0])."""
+        down_sample = self.score_down_sample
+        height, width = target_array.shape[:2]
+        if importance is None:
+            yy, xx = np.mgrid[0:height, 0:width]  # pylint:disable=invalid-name
+            importance = self._importance_map(crop, xx * down_sample, yy * down_sample)
+
+        detail = target_array[..., 1]
+        return self._score_dict(
+            float(np.sum(detail * importance)),
+            float(np.sum(target_array[..., 0] * (detail + self.skin_bias) * importance)),
+            float(np.sum(target_array[..., 2] * (detail + self.saturation_bias) * importance)),
+            float(np.sum(target_array[..., 3] * importance)),
+            crop)
+
+    def _score_dict(  # pylint:disable=too-many-arguments
+        self, detail: float, skin: float, saturation_score: float, boost: float, crop: dict
+    ) -> dict:
+        return {
+            'detail': detail,
+            'saturation': saturation_score,
+            'skin': skin,
+            'boost': boost,
+            'total': (
+                detail * self.detail_weight +
+                skin * self.skin_weight +
+                saturation_score * self.saturation_weight +
+                boost * self.boost_weight
+            ) / (crop['width'] * crop['height']),
+        }
 
 
 class SmartCropWithFace(SmartCrop):
@@ -426,8 +587,8 @@ class SmartCropWithFace(SmartCrop):
                  boost_weight: float = 100, score_down_sample: int = 8, skin_bias: float = 0.01, skin_brightness_max: float = 1, skin_brightness_min: float = 0.2, skin_color: tuple[float, float, float] | None = None, skin_threshold: float = 0.8, skin_weight: float = 1.8, debug=False):
         super().__init__(detail_weight, edge_radius, edge_weight, outside_importance, rule_of_thirds, saturation_bias, saturation_brightness_max, saturation_brightness_min,
                          saturation_threshold, saturation_weight, boost_weight, score_down_sample, skin_bias, skin_brightness_max, skin_brightness_min, skin_color, skin_threshold, skin_weight, debug)
-        from .facedet import FaceDetector
-        self.faceDtr = FaceDetector()
+        from .facedet import getFaceDetector
+        self.faceDtr = getFaceDetector()
 
     def crop(self, image, width: int, height: int, prescale: bool = True, max_scale: float = 1, min_scale: float = 0.9, scale_step: float = 0.1, step: int = 8) -> dict:
         boosts = []